@@ -1,11 +1,14 @@
 """
 Dave4272's Admin Tools
 """
+import logging
+
 from tools.manage.machineidgenerator import MachineIDGenerator
 from tools.ddns.agent import DDNSAgentv6
 from tools.rpi.config import ConfigGenerator
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     agent = ConfigGenerator(8, "mac.corpdk.com", "rpi4")
     agent(2, "./input/values.yml", "output")
     pass
\ No newline at end of file
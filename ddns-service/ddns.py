@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+"""
+DDNS Update Service
+
+Entry point of corpdk-update-ddns.service. The updater itself lives in
+tools.ddns.agent, this script only makes the repository root importable and runs it.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.ddns.agent import main  # noqa: E402
+
+if __name__ == "__main__":
+    main()
@@ -9,19 +9,216 @@ Supported providers:
   - DigitalOcean
 """
 
+from __future__ import annotations
+
+import argparse
+import hashlib
+import ipaddress
 import json
+import logging
 import os
+import queue
+import re
+import socket
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from typing import TYPE_CHECKING
+
+# the HTTP and provider libraries are imported where they are used, so that importing
+# this module (e.g. from cli.py) stays cheap on small machines
+if TYPE_CHECKING:
+    import requests
+    from pydo import Client
+    from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+CF_API_URL = "https://api.cloudflare.com/client/v4"
+CACHE_DIR = os.path.expanduser("~/.cache/ddns-agent")
+ZONE_CACHE = "zones.json"
+IP_CACHE = "last_ip"
+HOSTS_FILE = "./ddns.hosts"
+
+# a cached address older than this is pushed again to self-heal drifted records
+IP_CACHE_MAX_AGE = 24 * 60 * 60
+# seconds a looked up address is reused in-process, overridden by DDNS_IP_CACHE_TTL
+IP_CACHE_TTL = 300
+# seconds a resolved API host name is reused, getaddrinfo does not expose record TTLs
+DNS_CACHE_TTL = 60
+
+# Cloudflare error codes reported for a zone identifier that no longer exists
+ZONE_NOT_FOUND_CODES = (1001, 7003)
+
+# LDH labels below an alphabetic (or punycode) top-level domain
+_FQDN_RE = re.compile(
+    r"^(?=.{1,253}$)(?:(?!-)[A-Za-z0-9-]{1,63}(?<!-)\.)+"
+    r"(?:[A-Za-z]{2,63}|xn--[A-Za-z0-9]{1,59})$"
+)
+# one "<engine> <zone> <hostname>" entry of the hosts file, "#" starts a comment
+_HOST_LINE_RE = re.compile(
+    r"^[ \t]*([^\s#]+)[ \t]+([^\s#]+)[ \t]+([^\s#]+)[ \t\r]*(?:#[^\r\n]*)?\r?$",
+    re.MULTILINE,
+)
+
+
+def is_ipv6(address: str) -> bool:
+    """
+    Return True if `address` is a valid IPv6 address that can be published.
+
+    Scoped, IPv4-mapped and link-local addresses are rejected, as they are not reachable
+    through an AAAA record.
+    """
+    if "%" in address:
+        return False
+    try:
+        ip = ipaddress.IPv6Address(address)
+    except ValueError:
+        return False
+    return ip.ipv4_mapped is None and not ip.is_link_local
+
+
+def is_fqdn(name: str) -> bool:
+    """Return True if `name` is a valid fully qualified domain name."""
+    return _FQDN_RE.match(name) is not None
+
+
+def _read_cache(filename: str) -> str | None:
+    """Return the content of a cache file, or None if it cannot be read."""
+    try:
+        with open(os.path.join(CACHE_DIR, filename)) as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _write_cache(filename: str, content: str) -> None:
+    """Atomically replace the content of a cache file, ignoring failures."""
+    path = os.path.join(CACHE_DIR, filename)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("Warning: could not write cache %s: %s", path, e)
+
+
+_dns_cache: dict[tuple[str, int], tuple[list[str], float]] = {}
+_dns_cache_lock = threading.Lock()
+_dns_cache_adapter: type[HTTPAdapter] | None = None
+
+
+def _resolve_cached(host: str, port: int) -> list[str]:
+    """
+    Resolve `host` to its addresses, reusing the result for `DNS_CACHE_TTL` seconds.
+
+    Args:
+        host (str): The host name to resolve.
+        port (int): The port to connect to.
+
+    Returns:
+        list[str]: The addresses of the host, in the order of the system resolver.
+
+    Raises:
+        socket.gaierror: If the host name cannot be resolved.
+    """
+    from urllib3.util import connection
+
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_cache_lock:
+        entry = _dns_cache.get(key)
+    if entry is not None and now < entry[1]:
+        return entry[0]
+
+    family = connection.allowed_gai_family()
+    infos = socket.getaddrinfo(host.strip("[]"), port, family, socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+    with _dns_cache_lock:
+        _dns_cache[key] = (addresses, now + DNS_CACHE_TTL)
+    return addresses
 
-import CloudFlare
-import requests
-import validators
-from CloudFlare.exceptions import CloudFlareAPIError
-from dotenv import load_dotenv
-from pydo import Client
 
-load_dotenv()
+def _dns_cache_adapter_class() -> type[HTTPAdapter]:
+    """
+    Return an `HTTPAdapter` whose connections resolve host names through `_resolve_cached`.
+
+    Only sessions the adapter is mounted on use the cache, other urllib3 users in the
+    process keep resolving every connection. The classes are built on first use, so
+    requests and urllib3 are only imported once a session is needed.
+
+    Returns:
+        type[HTTPAdapter]: The adapter class.
+    """
+    global _dns_cache_adapter
+
+    if _dns_cache_adapter is not None:
+        return _dns_cache_adapter
+
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.exceptions import ConnectTimeoutError, NameResolutionError
+
+    def caching_connection(base: type[HTTPConnection]) -> type[HTTPConnection]:
+        class CachingConnection(base):  # type: ignore[valid-type, misc]
+            def _new_conn(self) -> socket.socket:
+                host = self._dns_host
+                try:
+                    addresses = _resolve_cached(host, self.port)
+                except socket.gaierror as e:
+                    raise NameResolutionError(self.host, self, e) from e
+
+                # each cached address is tried in order, the entry is dropped if
+                # none of them accepts the connection
+                error: ConnectTimeoutError | None = None
+                try:
+                    for ip_address in addresses:
+                        self._dns_host = ip_address
+                        try:
+                            return super()._new_conn()
+                        except ConnectTimeoutError as e:
+                            error = e
+                finally:
+                    self._dns_host = host
+
+                with _dns_cache_lock:
+                    _dns_cache.pop((host, self.port), None)
+                if error is None:
+                    raise NameResolutionError(
+                        self.host, self, socket.gaierror("no address for %s" % (host))
+                    )
+                raise error
+
+        return CachingConnection
+
+    class CachingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = caching_connection(HTTPConnection)
+
+    class CachingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = caching_connection(HTTPSConnection)
+
+    pool_classes = {
+        "http": CachingHTTPConnectionPool,
+        "https": CachingHTTPSConnectionPool,
+    }
+
+    class DNSCacheAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pool_classes
+
+        def proxy_manager_for(self, *args, **kwargs):
+            manager = super().proxy_manager_for(*args, **kwargs)
+            manager.pool_classes_by_scheme = pool_classes
+            return manager
+
+    _dns_cache_adapter = DNSCacheAdapter
+    return _dns_cache_adapter
 
 
 class DDNSUpdateError(Exception):
@@ -37,6 +234,129 @@ class DDNSEngines(Enum):
     DIGITALOCEAN = "do"
 
 
+# the provider codes accepted in the first column of the hosts file
+_ENGINE_VALUES: frozenset[str] = frozenset(engine.value for engine in DDNSEngines)
+
+
+class CFAPIError(DDNSUpdateError):
+    """Exception raised when a Cloudflare API call fails."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+    def __int__(self) -> int:
+        return self.code
+
+
+class CFClient(object):
+    """
+    Minimal client for the Cloudflare v4 REST API.
+
+    Only the zone and DNS record calls needed by the tools are implemented.
+    Listing calls follow the API pagination and return every item.
+
+    Args:
+        token (str): The Cloudflare API token.
+        session (requests.Session, optional): The HTTP session used for the API calls.
+
+    Attributes:
+        token_hash (str): The SHA-256 hex digest of the token.
+    """
+
+    def __init__(self, token: str, session: requests.Session | None = None) -> None:
+        import requests
+
+        self.headers = {
+            "Authorization": "Bearer %s" % (token),
+            "Content-Type": "application/json",
+        }
+        # identifies the token in cache files without storing the token itself
+        self.token_hash = hashlib.sha256(token.encode()).hexdigest()
+        self.session = session or requests.Session()
+
+    def _call(self, method: str, path: str, **kwargs) -> dict:
+        """
+        Issue an API call and return the decoded response body.
+
+        Raises:
+            CFAPIError: If the call fails or the API reports an error.
+        """
+        import requests
+
+        try:
+            resp = self.session.request(
+                method, CF_API_URL + path, headers=self.headers, timeout=10, **kwargs
+            )
+        except requests.RequestException as e:
+            raise CFAPIError(0, str(e)) from e
+        try:
+            body = resp.json()
+        except ValueError as e:
+            raise CFAPIError(resp.status_code, resp.reason) from e
+
+        if not body.get("success"):
+            error = (body.get("errors") or [{}])[0]
+            raise CFAPIError(
+                error.get("code", resp.status_code), error.get("message", resp.reason)
+            )
+        return body
+
+    def _paginate(self, path: str, params: dict) -> list[dict]:
+        """
+        Issue a listing API call and collect the items of every page.
+
+        Raises:
+            CFAPIError: If the call fails or the API reports an error.
+        """
+        params = dict(params, page=1)
+        items: list[dict] = []
+        while True:
+            body = self._call("GET", path, params=params)
+            items.extend(body["result"])
+            if params["page"] >= (body.get("result_info") or {}).get("total_pages", 1):
+                return items
+            params["page"] += 1
+
+    def get_zones(self, name: str | None = None) -> list[dict]:
+        """Return the zones accessible with the token, optionally filtered by name."""
+        params: dict = {"per_page": 50}
+        if name is not None:
+            params["name"] = name
+        return self._paginate("/zones", params)
+
+    def get_zone(self, zone_id: str) -> dict:
+        """Return the zone with the given ID."""
+        return self._call("GET", "/zones/%s" % (zone_id))["result"]
+
+    def list_aaaa(self, zone_id: str, name: str | None = None) -> list[dict]:
+        """Return the AAAA records of a zone, optionally filtered by name."""
+        params: dict = {"type": "AAAA", "per_page": 5000}
+        if name is not None:
+            params.update(name=name, match="all")
+        return self._paginate("/zones/%s/dns_records" % (zone_id), params)
+
+    def put_record(self, zone_id: str, record_id: str, body: dict) -> dict:
+        """Overwrite a DNS record and return the updated record."""
+        path = "/zones/%s/dns_records/%s" % (zone_id, record_id)
+        return self._call("PUT", path, json=body)["result"]
+
+    def post_record(self, zone_id: str, body: dict) -> dict:
+        """Create a DNS record and return it."""
+        path = "/zones/%s/dns_records" % (zone_id)
+        return self._call("POST", path, json=body)["result"]
+
+    def batch(self, zone_id: str, operations: dict) -> dict:
+        """
+        Apply `deletes`, `patches`, `puts` and `posts` operations to a zone in a single call.
+
+        Returns:
+            dict: The records affected by each kind of operation.
+        """
+        path = "/zones/%s/dns_records/batch" % (zone_id)
+        return self._call("POST", path, json=operations)["result"]
+
+
 class DDNSAgentv6(object):
     """
     DDNS Updater with IPv6 Support
@@ -45,14 +365,195 @@ class DDNSAgentv6(object):
     supported DNS providers. It retrieves the current IPv6 address of the machine,
     parses a configuration file specifying the DNS zones and hostnames to update
     on each provider, and communicates with the provider APIs to perform the update.
+
+    Args:
+        config_path (str | None): The hosts file to read, "-" for standard input. Defaults
+            to the `DDNS_CONFIG` environment variable, or `./ddns.hosts` if that is unset.
+
+    Attributes:
+        max_workers (int): Maximum number of provider API calls issued concurrently.
     """
 
+    max_workers: int = 10
+    _zone_ids: dict[str, str] | None = None
+    _zone_ids_token: str | None = None
+    _session: requests.Session | None = None
+    _ip_address: str | None = None
+    _ip_expires_at: float = 0.0
+    _ip_lookup: Future | None = None
+    _ip_lock = threading.Lock()
+    _env_loaded: bool = False
+    _tokens: dict[str, str | None] = {}
+    _cf_clients: dict[str, CFClient] = {}
+    _do_clients: dict[str, Client] = {}
+
+    def __init__(self, config_path: str | None = None) -> None:
+        self.config_path = config_path
+
+    def _config_file(self) -> str:
+        """Return the hosts file to read, "-" standing for standard input."""
+        return self.config_path or os.getenv("DDNS_CONFIG") or HOSTS_FILE
+
+    @classmethod
+    def _load_env(cls) -> None:
+        """
+        Load the variables of a `.env` file into the environment, once per process.
+        """
+
+        if not cls._env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            cls._env_loaded = True
+
+    @classmethod
+    def _token(cls, name: str) -> str | None:
+        """
+        Return the API token stored in the environment variable `name`.
+
+        Tokens do not change for the lifetime of the process, so they are read once.
+
+        Args:
+            name (str): The name of the environment variable.
+
+        Returns:
+            str | None: The token, or None if the variable is not set.
+        """
+
+        if name not in cls._tokens:
+            cls._tokens[name] = os.getenv(name)
+        return cls._tokens[name]
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """
+        Return the HTTP session shared by every API call of the agent.
+
+        The session is created on first use. It keeps connections to the APIs alive between
+        calls and retries idempotent requests on transient server errors. Each host keeps up
+        to `max_workers` idle connections, so the worker threads of `call_cf` and `call_do`
+        never have to discard one. The session's connections resolve host names through a
+        cache (`_resolve_cached`), without affecting other HTTP clients of the process.
+
+        Returns:
+            requests.Session: The shared HTTP session.
+        """
+
+        if cls._session is None:
+            import requests
+            from urllib3.util.retry import Retry
+
+            adapter = _dns_cache_adapter_class()(
+                pool_connections=4,
+                pool_maxsize=cls.max_workers,
+                max_retries=Retry(
+                    total=2,
+                    backoff_factor=0.2,
+                    status_forcelist=[500, 502, 503, 504],
+                ),
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def _cf_client(cls, cftoken: str) -> CFClient:
+        """
+        Return the Cloudflare client for `cftoken`, reused across invocations of the agent.
+
+        Args:
+            cftoken (str): The Cloudflare API token.
+
+        Returns:
+            CFClient: A Cloudflare client object bound to the shared HTTP session.
+        """
+
+        client = cls._cf_clients.get(cftoken)
+        if client is None:
+            client = cls._cf_clients[cftoken] = CFClient(cftoken, cls._get_session())
+        return client
+
+    @classmethod
+    def _do_client(cls, dotoken: str) -> Client:
+        """
+        Return the DigitalOcean client for `dotoken`, reused across invocations of the agent.
+
+        Args:
+            dotoken (str): The DigitalOcean API token.
+
+        Returns:
+            Client: A DigitalOcean client object.
+        """
+
+        client = cls._do_clients.get(dotoken)
+        if client is None:
+            from pydo import Client
+
+            client = cls._do_clients[dotoken] = Client(token=dotoken)
+        return client
+
     @classmethod
     def my_ipv6_address(cls) -> str:
         """
         Retrieve the IPv6 address of the current machine.
 
-        This method attempts to retrieve the IPv6 address from several public APIs.
+        The address is looked up with the `_lookup_ipv6_address` method and reused for
+        `DDNS_IP_CACHE_TTL` seconds (`IP_CACHE_TTL` by default), so a long-running process
+        invoking the agent repeatedly does not query the public APIs every time.
+        A TTL of 0 disables the cache. Concurrent callers share a single lookup.
+
+        Returns:
+            str: The IPv6 address of the current machine.
+        """
+
+        with cls._ip_lock:
+            if cls._ip_address is not None and time.monotonic() < cls._ip_expires_at:
+                return cls._ip_address
+            lookup = cls._ip_lookup
+            if lookup is None:
+                lookup = cls._ip_lookup = Future()
+                owner = True
+            else:
+                owner = False
+
+        # another thread is already looking the address up, wait for its result
+        if not owner:
+            return lookup.result()
+
+        try:
+            ttl = float(os.getenv("DDNS_IP_CACHE_TTL", IP_CACHE_TTL))
+        except ValueError:
+            log.warning(
+                "Warning: invalid DDNS_IP_CACHE_TTL %r, using %s seconds",
+                os.getenv("DDNS_IP_CACHE_TTL"),
+                IP_CACHE_TTL,
+            )
+            ttl = IP_CACHE_TTL
+
+        try:
+            ip_address = cls._lookup_ipv6_address()
+            cls._ip_address = ip_address
+            cls._ip_expires_at = time.monotonic() + ttl
+            lookup.set_result(ip_address)
+        except BaseException as e:
+            lookup.set_exception(e)
+            raise
+        finally:
+            with cls._ip_lock:
+                cls._ip_lookup = None
+        return ip_address
+
+    @classmethod
+    def _lookup_ipv6_address(cls) -> str:
+        """
+        Query public APIs for the IPv6 address of the current machine.
+
+        This method queries several public APIs concurrently and returns the first valid
+        IPv6 address received, in its compressed form. The queries run on daemon threads,
+        so neither this method nor the interpreter exit waits for the slower APIs once an
+        address is known.
         If none of the APIs respond with a valid IPv6 address, an error is raised.
 
         Args:
@@ -72,31 +573,226 @@ class DDNSAgentv6(object):
         ]
         ip_address = str()
         err_outputs = list()
-        for url in ip_finders:
+        session = cls._get_session()
+        answers: queue.Queue[tuple[str, str | None, Exception | None]] = queue.Queue()
+
+        def probe(url: str) -> None:
             try:
-                ip_address = requests.get(url, timeout=5).text
+                # some APIs terminate the address with a newline
+                answer = session.get(url, timeout=(2, 3)).text.strip()
+                answers.put((url, answer, None))
             except Exception as e:
-                err_outputs.append({"api": url, "output": str(e)})
+                answers.put((url, None, e))
+
+        for url in ip_finders:
+            threading.Thread(target=probe, args=(url,), daemon=True).start()
+
+        # first valid answer wins, the remaining probes are abandoned
+        for _ in ip_finders:
+            url, answer, error = answers.get()
+            if answer is None:
+                err_outputs.append({"api": url, "output": str(error)})
                 continue
 
-            if validators.ipv6(ip_address):  # type: ignore
+            if is_ipv6(answer):
+                # compressed form, as echoed back by the DNS providers
+                ip_address = str(ipaddress.IPv6Address(answer))
                 break
 
-            err_outputs.append({"api": url, "output": ip_address})
+            err_outputs.append({"api": url, "output": answer})
 
-        if not validators.ipv6(ip_address):  # type: ignore
-            print(
-                "Error: Could not find ipv6 address"
-                + json.dumps(err_outputs, indent=4),
-                file=sys.stderr,
+        if not is_ipv6(ip_address):
+            log.error(
+                "Error: Could not find ipv6 address%s",
+                json.dumps(err_outputs, indent=4),
             )
-            exit(1)
+            raise SystemExit(1)
 
         return ip_address
 
+    @staticmethod
+    def ip_unchanged(ip_address: str, hosts_digest: str) -> bool:
+        """
+        Check whether `ip_address` was already pushed to the same hosts by a recent run.
+
+        The address of the last successful run is kept in the `last_ip` cache file together
+        with the digest of the hosts it was pushed to. It only counts as unchanged while that
+        file is younger than `IP_CACHE_MAX_AGE` and was written for the same hosts, so records
+        are refreshed periodically and hosts from another or edited configuration get updated.
+
+        Args:
+            ip_address (str): The current IPv6 address of the machine.
+            hosts_digest (str): The digest of the parsed hosts, see `hosts_digest`.
+
+        Returns:
+            bool: True if no DNS update is needed, False otherwise.
+        """
+
+        try:
+            cached_at = os.path.getmtime(os.path.join(CACHE_DIR, IP_CACHE))
+        except OSError:
+            return False
+        if time.time() - cached_at >= IP_CACHE_MAX_AGE:
+            return False
+        return _read_cache(IP_CACHE) == "%s\n%s\n" % (ip_address, hosts_digest)
+
+    def hosts_digest(self) -> str:
+        """
+        Return a digest of the hosts parsed by the `parse_host_file` method.
+
+        Returns:
+            str: The SHA-256 hex digest of the Cloudflare and DigitalOcean hosts.
+        """
+
+        hosts = json.dumps([self.dns_names_cf, self.dns_names_do], sort_keys=True)
+        return hashlib.sha256(hosts.encode()).hexdigest()
+
+    @classmethod
+    def _cached_zone_ids(cls, cf: CFClient) -> dict[str, str]:
+        """
+        Return the zone IDs by zone name known from the `zones.json` cache file.
+
+        Zone IDs do not change for the lifetime of a domain, so they are kept across runs.
+        The cache records a hash of the token it was built with and is discarded when used
+        with another token, as the same zone name may belong to another account.
+
+        Args:
+            cf (CFClient): A Cloudflare client object.
+
+        Returns:
+            dict[str, str]: The cached zone IDs keyed by lowercase zone name.
+        """
+
+        if cls._zone_ids is None or cls._zone_ids_token != cf.token_hash:
+            try:
+                cache = json.loads(_read_cache(ZONE_CACHE) or "{}")
+            except ValueError:
+                cache = {}
+            zone_ids = {}
+            if isinstance(cache, dict) and cache.get("token") == cf.token_hash:
+                zone_ids = cache.get("zones") or {}
+            cls._zone_ids = {
+                name.lower(): zone_id for name, zone_id in zone_ids.items()
+            }
+            cls._zone_ids_token = cf.token_hash
+        return cls._zone_ids
+
+    @classmethod
+    def _store_zone_ids(cls) -> None:
+        """Write the zone ID cache to the `zones.json` cache file."""
+        _write_cache(
+            ZONE_CACHE,
+            json.dumps({"token": cls._zone_ids_token, "zones": cls._zone_ids}),
+        )
+
+    @classmethod
+    def _refresh_zone_ids(cls, cf: CFClient) -> dict[str, str]:
+        """
+        List every zone accessible with the token and rebuild the zone ID cache from it.
+
+        Args:
+            cf (CFClient): A Cloudflare client object.
+
+        Returns:
+            dict[str, str]: The zone IDs keyed by lowercase zone name.
+
+        Raises:
+            DDNSUpdateError: If the zones cannot be listed.
+        """
+
+        try:
+            zones = cf.get_zones()
+        except CFAPIError as e:
+            raise DDNSUpdateError(
+                "Error: /zones %d %s - api call failed" % (e, e)
+            ) from e
+
+        cls._zone_ids = {zone["name"].lower(): zone["id"] for zone in zones}
+        cls._zone_ids_token = cf.token_hash
+        cls._store_zone_ids()
+        return cls._zone_ids
+
+    @classmethod
+    def _resolve_zone_ids(cls, cf: CFClient, zone_names: list[str]) -> dict[str, str]:
+        """
+        Translate Cloudflare zone names into their zone IDs.
+
+        Resolved IDs are served from the zone ID cache. When a zone is missing from the cache,
+        every zone accessible with the token is listed at once instead of querying each zone by name.
+        Zone names are compared case-insensitively.
+
+        Args:
+            cf (CFClient): A Cloudflare client object.
+            zone_names (list[str]): The names of the Cloudflare zones.
+
+        Returns:
+            dict[str, str]: The zone IDs keyed by zone name. Zones that do not exist are left out.
+
+        Raises:
+            DDNSUpdateError: If the zones cannot be listed.
+        """
+
+        zone_ids = cls._cached_zone_ids(cf)
+        if any(zone_name.lower() not in zone_ids for zone_name in zone_names):
+            zone_ids = cls._refresh_zone_ids(cf)
+
+        return {
+            zone_name: zone_ids[zone_name.lower()]
+            for zone_name in zone_names
+            if zone_name.lower() in zone_ids
+        }
+
+    @classmethod
+    def find_zone(cls, cf: CFClient, dns_name: str) -> tuple[str, str] | None:
+        """
+        Find the Cloudflare zone a DNS name belongs to.
+
+        The zone is the longest parent domain of `dns_name` (or `dns_name` itself) that is a zone
+        of the account, which also holds for multi-label public suffixes such as `co.uk` and for
+        delegated sub-zones. Names are compared case-insensitively.
+
+        Args:
+            cf (CFClient): A Cloudflare client object.
+            dns_name (str): The DNS name to look up.
+
+        Returns:
+            tuple[str, str] | None: The lowercase zone name and zone ID, or None if no zone
+                matches.
+
+        Raises:
+            DDNSUpdateError: If the zones cannot be listed.
+        """
+
+        labels = dns_name.lower().split(".")
+        candidates = [".".join(labels[i:]) for i in range(len(labels))]
+
+        zone_ids = cls._cached_zone_ids(cf)
+        if not any(candidate in zone_ids for candidate in candidates):
+            zone_ids = cls._refresh_zone_ids(cf)
+
+        for candidate in candidates:
+            if candidate in zone_ids:
+                return candidate, zone_ids[candidate]
+        return None
+
+    @classmethod
+    def _forget_zone_id(cls, zone_name: str) -> None:
+        """
+        Drop a zone from the zone ID cache so that it is resolved again on the next run.
+
+        Args:
+            zone_name (str): The name of the Cloudflare zone.
+        """
+
+        if (
+            cls._zone_ids is not None
+            and cls._zone_ids.pop(zone_name.lower(), None) is not None
+        ):
+            cls._store_zone_ids()
+
     @classmethod
     def cf_dns_update(
-        cls, cf: CloudFlare.CloudFlare, zone_id: str, dns_name: str, ip_address: str
+        cls, cf: CFClient, zone_id: str, dns_name: str, ip_address: str
     ) -> None:
         """
         Update DNS records with the specified IPv6 address for Cloudflare.
@@ -106,7 +802,7 @@ class DDNSAgentv6(object):
         it updates the record's content with the new IP address. Otherwise, a new AAAA record is created.
 
         Args:
-            cf (CloudFlare.CloudFlare): A Cloudflare client object.
+            cf (CFClient): A Cloudflare client object.
             zone_id (str): The ID of the Cloudflare zone to update.
             dns_name (str): The DNS hostname to update.
             ip_address (str): The new IPv6 address to set.
@@ -116,79 +812,179 @@ class DDNSAgentv6(object):
         """
 
         try:
-            params = {"name": dns_name, "match": "all", "type": "AAAA"}
-            dns_records = cf.zones.dns_records.get(zone_id, params=params)
-        except CloudFlareAPIError as e:
+            dns_records = cf.list_aaaa(zone_id, dns_name)
+        except CFAPIError as e:
             raise DDNSUpdateError(
                 "Error: /zones/dns_records %s - %d %s - api call failed"
                 % (dns_name, e, e)
             ) from e
 
         updated = False
+        aaaa_record = {"name": dns_name, "type": "AAAA", "content": ip_address}
 
         # update the record - unless it's already correct
         for dns_record in dns_records:
             old_ip_address = dns_record["content"]
 
             if ip_address == old_ip_address:
-                print("UNCHANGED: %s %s" % (dns_name, ip_address))
+                log.info("UNCHANGED: %s %s", dns_name, ip_address)
                 updated = True
                 continue
 
-            proxied_state = dns_record["proxied"]
-
             # Yes, we need to update this record
-            dns_record_id = dns_record["id"]
-            dns_record = {
-                "name": dns_name,
-                "type": "AAAA",
-                "content": ip_address,
-                "proxied": proxied_state,
-            }
             try:
-                dns_record = cf.zones.dns_records.put(
-                    zone_id, dns_record_id, data=dns_record
+                dns_record = cf.put_record(
+                    zone_id,
+                    dns_record["id"],
+                    {**aaaa_record, "proxied": dns_record["proxied"]},
                 )
-                params = {"name": dns_name, "match": "all", "type": "AAAA"}
-                dns_records = cf.zones.dns_records.get(zone_id, params=params)
-                if dns_records[0]["content"] == ip_address:
-                    updated = True
-                else:
-                    raise DDNSUpdateError("Error: Record was not updated")
-            except CloudFlareAPIError as e:
+            except CFAPIError as e:
                 raise DDNSUpdateError(
                     "Error: /zones.dns_records.put %s - %d %s - api call failed"
                     % (dns_name, e, e)
                 ) from e
-            print("UPDATED: %s %s -> %s" % (dns_name, old_ip_address, ip_address))
+            # the API answers with the updated record, no need to fetch it again
+            if dns_record["content"] != ip_address:
+                raise DDNSUpdateError("Error: Record was not updated")
+            updated = True
+            log.info("UPDATED: %s %s -> %s", dns_name, old_ip_address, ip_address)
 
         if updated:
             return
 
         # no existing dns record to update - so create dns record
-        dns_record = {
-            "name": dns_name,
-            "type": "AAAA",
-            "content": ip_address,
-            "ttl": 60,
-        }
         try:
-            dns_record = cf.zones.dns_records.post(zone_id, data=dns_record)
-            params = {"name": dns_name, "match": "all", "type": "AAAA"}
-            dns_records = cf.zones.dns_records.get(zone_id, params=params)
-            if dns_records[0]["content"] != ip_address:
-                print("Error: Record was not created", file=sys.stderr)
-                return
-        except CloudFlareAPIError as e:
+            dns_record = cf.post_record(zone_id, {**aaaa_record, "ttl": 60})
+        except CFAPIError as e:
             raise DDNSUpdateError(
                 "Error: /zones.dns_records.post %s - %d %s - api call failed"
                 % (dns_name, e, e)
             ) from e
-        print("CREATED: %s %s" % (dns_name, ip_address))
+        if dns_record["content"] != ip_address:
+            raise DDNSUpdateError("Error: Record was not created")
+        log.info("CREATED: %s %s", dns_name, ip_address)
+
+    @classmethod
+    def cf_zone_update(
+        cls,
+        cf: CFClient,
+        zone_id: str,
+        dns_list: list[str],
+        ip_address: str,
+    ) -> None:
+        """
+        Update the DNS records of several hostnames in one Cloudflare zone with the specified IPv6 address.
+
+        This method lists every AAAA record of the zone identified by `zone_id` in a single call and
+        compares them with `dns_list` locally, ignoring case like DNS does. Records holding another
+        address are patched and hostnames without a record are created, all through a single call to
+        the batch DNS records endpoint.
+
+        Args:
+            cf (CFClient): A Cloudflare client object.
+            zone_id (str): The ID of the Cloudflare zone to update.
+            dns_list (list[str]): The DNS hostnames to update.
+            ip_address (str): The new IPv6 address to set.
+
+        Raises:
+            DDNSUpdateError: If unable to update the DNS records.
+        """
+
+        try:
+            dns_records = cf.list_aaaa(zone_id)
+        except CFAPIError as e:
+            raise DDNSUpdateError(
+                "Error: /zones/dns_records %s - %d %s - api call failed"
+                % (zone_id, e, e)
+            ) from e
+
+        records_by_name: dict[str, list[dict]] = {}
+        for dns_record in dns_records:
+            records_by_name.setdefault(dns_record["name"].lower(), []).append(
+                dns_record
+            )
+
+        patches: list[dict] = []
+        posts: list[dict] = []
+        old_ip_addresses: dict[str, str] = {}
+        # hosts only differing in case are the same DNS name
+        for dns_name in dict.fromkeys(dns_name.lower() for dns_name in dns_list):
+            if dns_name not in records_by_name:
+                posts.append(
+                    {
+                        "name": dns_name,
+                        "type": "AAAA",
+                        "content": ip_address,
+                        "ttl": 60,
+                    }
+                )
+                continue
+
+            # update the records - unless they're already correct
+            for dns_record in records_by_name[dns_name]:
+                if dns_record["content"] == ip_address:
+                    log.info("UNCHANGED: %s %s", dns_name, ip_address)
+                    continue
+                old_ip_addresses[dns_record["id"]] = dns_record["content"]
+                patches.append({"id": dns_record["id"], "content": ip_address})
+
+        if len(patches) == 0 and len(posts) == 0:
+            return
+
+        try:
+            result = cf.batch(zone_id, {"patches": patches, "posts": posts})
+        except CFAPIError as e:
+            raise DDNSUpdateError(
+                "Error: /zones/dns_records/batch %s - %d %s - api call failed"
+                % (zone_id, e, e)
+            ) from e
+
+        for dns_record in result.get("patches") or []:
+            if dns_record["content"] != ip_address:
+                raise DDNSUpdateError(
+                    "Error: Record %s was not updated" % (dns_record["name"])
+                )
+            log.info(
+                "UPDATED: %s %s -> %s",
+                dns_record["name"],
+                old_ip_addresses.get(dns_record["id"]),
+                ip_address,
+            )
+        for dns_record in result.get("posts") or []:
+            if dns_record["content"] != ip_address:
+                raise DDNSUpdateError(
+                    "Error: Record %s was not created" % (dns_record["name"])
+                )
+            log.info("CREATED: %s %s", dns_record["name"], ip_address)
+
+    @staticmethod
+    def do_record_name(zone: str, dns_name: str) -> str | None:
+        """
+        Return the record name DigitalOcean uses for `dns_name` within `zone`.
+
+        Args:
+            zone (str): The name of the DigitalOcean zone.
+            dns_name (str): The DNS hostname.
+
+        Returns:
+            str | None: The hostname relative to the zone, "@" for the zone apex, or None if the
+                hostname is not part of the zone.
+        """
+
+        if dns_name == zone:
+            return "@"
+        if dns_name.endswith("." + zone):
+            return dns_name[: -len(zone) - 1]
+        return None
 
     @classmethod
     def do_dns_update(
-        cls, do: Client, zone: str, dns_name: str, ip_address: str
+        cls,
+        do: Client,
+        zone: str,
+        dns_name: str,
+        ip_address: str,
+        record_name: str | None = None,
     ) -> None:
         """
         Update DNS records with the specified IPv6 address for DigitalOcean.
@@ -202,6 +998,8 @@ class DDNSAgentv6(object):
             zone (str): The name of the DigitalOcean zone to update.
             dns_name (str): The DNS hostname to update.
             ip_address (str): The new IPv6 address to set.
+            record_name (str | None): The hostname relative to the zone, as returned by
+                `do_record_name`. Derived from `dns_name` if not given.
 
         Raises:
             DDNSUpdateError: If unable to update the DNS record.
@@ -209,12 +1007,14 @@ class DDNSAgentv6(object):
 
         dns_records = list()
 
-        if dns_name.find(zone) == -1:
-            print("Error: %s not part of Zone %s" % (dns_name, zone), file=sys.stderr)
-            return
+        if record_name is None:
+            record_name = cls.do_record_name(zone, dns_name)
+            if record_name is None:
+                log.error("Error: %s not part of Zone %s", dns_name, zone)
+                return
 
         fqdn = dns_name
-        dns_name = dns_name.removesuffix("." + zone)
+        dns_name = record_name
 
         try:
             resp = do.domains.list_records(domain_name=zone, name=fqdn, type="AAAA")
@@ -222,11 +1022,21 @@ class DDNSAgentv6(object):
                 dns_records = resp.get("domain_records")
         except Exception as e:
             raise DDNSUpdateError(
-                "Error: /zones/dns_records %s - %d %s - api call failed"
-                % (dns_name, e, e)
+                "Error: /zones/dns_records %s - %s - api call failed" % (dns_name, e)
             ) from e
 
         updated = False
+        aaaa_record = {
+            "type": "AAAA",
+            "name": dns_name,
+            "data": ip_address,
+            "priority": None,
+            "port": None,
+            "ttl": 60,
+            "weight": None,
+            "flags": None,
+            "tag": None,
+        }
 
         # update the record - unless it's already correct
         if dns_records is None:
@@ -235,68 +1045,42 @@ class DDNSAgentv6(object):
             old_ip_address = dns_record["data"]
 
             if ip_address == old_ip_address:
-                print("UNCHANGED: %s %s" % (dns_name, ip_address))
+                log.info("UNCHANGED: %s %s", dns_name, ip_address)
                 updated = True
                 continue
 
             # Yes, we need to update this record
-            dns_record_id = dns_record["id"]
-            dns_record = {
-                "type": "AAAA",
-                "name": dns_name,
-                "data": ip_address,
-                "priority": None,
-                "port": None,
-                "ttl": 60,
-                "weight": None,
-                "flags": None,
-                "tag": None,
-            }
             try:
-                dns_record = do.domains.update_record(
+                resp = do.domains.update_record(
                     domain_name=zone,
-                    domain_record_id=dns_record_id,
-                    body=dns_record,
+                    domain_record_id=dns_record["id"],
+                    body=aaaa_record,
                 )
-                if dns_record.get("domain_record") is not None:
-                    updated = True
-                else:
-                    print("Error: Record was not updated", file=sys.stderr)
-                    return
             except Exception as e:
                 raise DDNSUpdateError(
-                    "Error: /zones.dns_records.put %s - %d %s - api call failed"
-                    % (dns_name, e, e)
+                    "Error: /zones.dns_records.put %s - %s - api call failed"
+                    % (dns_name, e)
                 ) from e
-            print("UPDATED: %s %s -> %s" % (dns_name, old_ip_address, ip_address))
+            # the API answers with the updated record, no need to fetch it again
+            if (resp.get("domain_record") or {}).get("data") != ip_address:
+                raise DDNSUpdateError("Error: Record was not updated")
+            updated = True
+            log.info("UPDATED: %s %s -> %s", dns_name, old_ip_address, ip_address)
 
         if updated:
             return
 
         # no existing dns record to update - so create dns record
-        dns_record = {
-            "type": "AAAA",
-            "name": dns_name,
-            "data": ip_address,
-            "priority": None,
-            "port": None,
-            "ttl": 60,
-            "weight": None,
-            "flags": None,
-            "tag": None,
-        }
         try:
-            dns_record = do.domains.create_record(domain_name=zone, body=dns_record)
-            if dns_record.get("domain_record") is None:
-                print("Error: Record was not created", file=sys.stderr)
-                return
+            resp = do.domains.create_record(domain_name=zone, body=aaaa_record)
         except Exception as e:
             raise DDNSUpdateError(
-                "Error: /zones.dns_records.post %s - %d %s - api call failed"
-                % (dns_name, e, e)
+                "Error: /zones.dns_records.post %s - %s - api call failed"
+                % (dns_name, e)
             ) from e
-        print("CREATED: %s %s" % (dns_name, ip_address))
-        pass
+        if (resp.get("domain_record") or {}).get("data") != ip_address:
+            raise DDNSUpdateError("Error: Record was not created")
+        log.info("CREATED: %s %s", dns_name, ip_address)
 
     def call_cf(self, cftoken: str) -> None:
         """
@@ -304,17 +1088,16 @@ class DDNSAgentv6(object):
 
         This method performs the following steps to update DNS records for Cloudflare zones:
 
-        1. Initializes a Cloudflare client object using the provided `cftoken`.
-        2. Iterates through the `dns_names_cf` dictionary (populated from the configuration file).
-            - For each zone:
-                - Retrieves the zone ID using the `zone` name and the Cloudflare API.
-                - Iterates through the list of hostnames (`dns_list`) associated with the zone.
-                - For each hostname:
-                    - Calls the `cf_dns_update` method to update the DNS record
-                        with the retrieved IPv6 address (`self.ip_address`).
-                    - Catches any `DDNSUpdateError` exceptions and appends them to an error list.
+        1. Gets the Cloudflare client object for the provided `cftoken`.
+        2. Retrieves the IDs of all zones of the `dns_names_cf` dictionary (populated from the
+            configuration file) using the `_resolve_zone_ids` method.
+        3. Calls the `cf_zone_update` method for every resolved zone concurrently, using at most
+            `max_workers` threads, to update the zone's DNS records with the retrieved
+            IPv6 address (`self.ip_address`) in a single batch.
+            - Catches any `DDNSUpdateError` exceptions and appends them to an error list.
+            - Drops the zone from the zone ID cache if Cloudflare no longer knows its ID.
 
-        3. Raises a `DDNSUpdateError` if there were any errors encountered during the update process.
+        4. Raises a `DDNSUpdateError` if there were any errors encountered during the update process.
             The raised error message will be a JSON-formatted string containing all the encountered errors.
 
         Args:
@@ -326,43 +1109,49 @@ class DDNSAgentv6(object):
                 The error message will be a JSON-formatted string containing details about the errors.
         """
 
-        cf = CloudFlare.CloudFlare(token=cftoken)
+        cf = self._cf_client(cftoken)
 
         errors: list[str] = []
+        updates: list[tuple[str, str, list[str]]] = []
 
-        for zone, dns_list in self.dns_names_cf.items():
-            # grab the zone identifier
-            try:
-                params = {"name": zone}
-                zones = cf.zones.get(params=params)
-            except CloudFlareAPIError as e:
-                errors.append("Error: /zones %d %s - api call failed" % (e, e))
-                continue
-            except Exception as e:
-                errors.append("Error: /zones.get - %s - api call failed" % (e))
-                continue
+        # grab the zone identifiers
+        try:
+            zone_ids = self._resolve_zone_ids(cf, list(self.dns_names_cf.keys()))
+        except DDNSUpdateError as e:
+            raise DDNSUpdateError(json.dumps([str(e)])) from e
 
-            if len(zones) == 0:
+        for zone, dns_list in self.dns_names_cf.items():
+            if zone not in zone_ids:
                 errors.append("Error: /zones.get - %s - zone not found" % (zone))
                 continue
 
-            if len(zones) != 1:
-                errors.append(
-                    "Error: /zones.get - %s - api call returned %d items"
-                    % (zone, len(zones))
-                )
-                continue
-
-            zone_id = zones[0]["id"]
-
-            for dns in dns_list:
+            updates.append((zone, zone_ids[zone], dns_list))
+
+        # each zone update is a chain of blocking round-trips, so fan them out
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.cf_zone_update,
+                    cf,
+                    zone_id,
+                    dns_list,
+                    self.ip_address,
+                ): zone
+                for zone, zone_id, dns_list in updates
+            }
+            for future, zone in futures.items():
                 try:
-                    self.cf_dns_update(cf, zone_id, dns, self.ip_address)
+                    future.result()
                 except DDNSUpdateError as e:
-                    errors.append("Error Updating %s: %s" % (e))
+                    if (
+                        isinstance(e.__cause__, CFAPIError)
+                        and e.__cause__.code in ZONE_NOT_FOUND_CODES
+                    ):
+                        self._forget_zone_id(zone)
+                    errors.append(f"Error Updating {zone}: {e}")
 
         if len(errors) != 0:
-            raise DDNSUpdateError(json.dumps(errors, indent=4))
+            raise DDNSUpdateError(json.dumps(errors))
 
     def call_do(self, dotoken: str) -> None:
         """
@@ -370,16 +1159,15 @@ class DDNSAgentv6(object):
 
         This method performs the following steps to update DNS records for DigitalOcean zones:
 
-        1. Initializes a DigitalOcean client object using the provided `dotoken`.
+        1. Gets the DigitalOcean client object for the provided `dotoken`.
         2. Iterates through the `dns_names_do` dictionary (populated from the configuration file).
             - For each zone:
                 - Attempts to retrieve the zone details using the `do.domains.get` method.
                 - If the zone is not found (`"not_found"` in response), a `DDNSUpdateError` is raised.
-                - Otherwise, iterates through the list of hostnames (`dns_list`) associated with the zone.
-                - For each hostname:
-                    - Calls the `do_dns_update` method to update the DNS record
-                        with the retrieved IPv6 address (`self.ip_address`).
-                    - Catches any `DDNSUpdateError` exceptions and appends them to an error list.
+                - Otherwise, submits the `do_dns_update` method for every hostname (`dns_list`)
+                    associated with the zone to a pool of at most `max_workers` threads, updating
+                    the DNS record with the retrieved IPv6 address (`self.ip_address`).
+                - Catches any `DDNSUpdateError` exceptions and appends them to an error list.
 
         3. Raises a `DDNSUpdateError` if there were any errors encountered during the update process.
             The raised error message will be a JSON-formatted string containing all the encountered errors.
@@ -393,26 +1181,42 @@ class DDNSAgentv6(object):
                 The error message will be a JSON-formatted string containing details about the errors.
         """
 
-        do = Client(token=dotoken)
+        do = self._do_client(dotoken)
 
         errors: list[str] = []
+        futures: dict[Future, str] = {}
 
-        for zone, dns_list in self.dns_names_do.items():
-            try:
-                zones = do.domains.get(zone)
-                if zones.get("id") == "not_found":
-                    raise DDNSUpdateError("Error: Zone %s Not Found" % (zone))
-
-                for dns in dns_list:
-                    try:
-                        self.do_dns_update(do, zone, dns, self.ip_address)
-                    except DDNSUpdateError as e:
-                        errors.append("Error Updating %s: %s" % (e))
-            except Exception as e:
-                errors.append("DO Error %s" % (e))
-            pass
+        # records are updated while the remaining zones are still being looked up
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for zone, dns_list in self.dns_names_do.items():
+                try:
+                    zones = do.domains.get(zone)
+                    if zones.get("id") == "not_found":
+                        raise DDNSUpdateError("Error: Zone %s Not Found" % (zone))
+                except Exception as e:
+                    errors.append("DO Error %s" % (e))
+                    continue
+
+                for dns, record_name in dns_list:
+                    future = executor.submit(
+                        self.do_dns_update,
+                        do,
+                        zone,
+                        dns,
+                        self.ip_address,
+                        record_name,
+                    )
+                    futures[future] = dns
+
+            for future, dns in futures.items():
+                try:
+                    future.result()
+                except DDNSUpdateError as e:
+                    errors.append(f"Error Updating {dns}: {e}")
+                except Exception as e:
+                    errors.append("DO Error %s" % (e))
         if len(errors) != 0:
-            raise DDNSUpdateError(json.dumps(errors, indent=4))
+            raise DDNSUpdateError(json.dumps(errors))
 
     @staticmethod
     def line_inp_valid(test: list[str]) -> bool:
@@ -433,9 +1237,9 @@ class DDNSAgentv6(object):
 
         if len(test) != 3:
             return False
-        if test[0] not in DDNSEngines._value2member_map_.keys():
+        if test[0] not in _ENGINE_VALUES:
             return False
-        if not validators.domain(test[1]) or not validators.domain(test[2]):
+        if not is_fqdn(test[1]) or not is_fqdn(test[2]):
             return False
         return True
 
@@ -444,44 +1248,66 @@ class DDNSAgentv6(object):
         Parse the configuration file and populate internal data structures.
 
         This method reads the configuration file specified by the `-c` argument or the
-        `DDNS_CONFIG` environment variable. It validates each line's format and populates
-        internal dictionaries `dns_names_cf` and `dns_names_do` for Cloudflare and DigitalOcean zones,
-        respectively.
+        `DDNS_CONFIG` environment variable, or from standard input if that is "-". It
+        validates each line's format and populates internal dictionaries `dns_names_cf`
+        and `dns_names_do` for Cloudflare and DigitalOcean zones, respectively. Duplicate
+        hostnames are dropped and each zone's hostnames are sorted. DigitalOcean hostnames
+        are stored together with their record name relative to the zone, and hostnames
+        outside of their zone are dropped. Everything following a "#" is a comment.
 
         Raises:
             DDNSUpdateError: If the configuration file cannot be found or is invalid.
         """
-        self.dns_names_cf: dict[str, list[str]] = {}
-        self.dns_names_do: dict[str, list[str]] = {}
-        with open("./ddns.hosts") as file:
-            for line in file:
-                test = line.strip().split(" ")
-                if self.line_inp_valid(test):
-                    if test[0] == "cf":
-                        self.dns_names_cf.setdefault(test[1], []).append(test[2])
-                    elif test[0] == "do":
-                        self.dns_names_do.setdefault(test[1], []).append(test[2])
+        hosts: dict[str, dict[str, set[str]]] = {"cf": {}, "do": {}}
+        config_path = self._config_file()
+        if config_path == "-":
+            content = sys.stdin.read()
+        else:
+            with open(config_path) as file:
+                content = file.read()
+
+        for match in _HOST_LINE_RE.finditer(content):
+            test = list(match.groups())
+            if self.line_inp_valid(test):
+                hosts[test[0]].setdefault(test[1], set()).add(test[2])
+
+        self.dns_names_cf: dict[str, list[str]] = {
+            zone: sorted(names) for zone, names in hosts["cf"].items()
+        }
+        self.dns_names_do: dict[str, list[tuple[str, str]]] = {}
+        for zone, names in hosts["do"].items():
+            dns_list: list[tuple[str, str]] = []
+            for dns_name in sorted(names):
+                record_name = self.do_record_name(zone, dns_name)
+                if record_name is None:
+                    log.error("Error: %s not part of Zone %s", dns_name, zone)
+                    continue
+                dns_list.append((dns_name, record_name))
+            if len(dns_list) != 0:
+                self.dns_names_do[zone] = dns_list
 
         if len(self.dns_names_cf) == 0 and len(self.dns_names_do) == 0:
-            print(
-                "Error: No DDNS Host specified or set to a proper FQDN", file=sys.stderr
-            )
-            exit(1)
+            log.error("Error: No DDNS Host specified or set to a proper FQDN")
+            raise SystemExit(1)
 
-        print(
-            "HOSTS TO UPDATE:\n\tCloudFlare: %s\n\tDigitalOcean: %s"
-            % (self.dns_names_cf, self.dns_names_do)
+        log.info(
+            "HOSTS TO UPDATE:\n\tCloudFlare: %s\n\tDigitalOcean: %s",
+            self.dns_names_cf,
+            self.dns_names_do,
         )
 
-    def __call__(self) -> None:
+    def __call__(self, force: bool = False) -> None:
         """
         Main entry point for the DDNS update process.
 
-        This method performs the following steps to update DNS records:
+        This method loads the variables of a `.env` file into the environment on its first
+        invocation, then performs the following steps to update DNS records:
 
         1. Retrieves the current IPv6 address of the machine using the `my_ipv6_address` method.
-        2. Prints the retrieved IPv6 address to the console.
-        3. Parses the configuration file using the `parse_host_file` method to populate internal data structures.
+        2. Parses the configuration file using the `parse_host_file` method to populate internal data structures.
+        3. Prints the retrieved IPv6 address to the console and stops there if the
+            `ip_unchanged` method reports that the address was already pushed to the same
+            hosts, unless `force` is set or the `DDNS_FORCE` environment variable is "1".
         4. Checks for the presence of the CLOUDFLARE_API_TOKEN environment variable:
             - If the token exists and there are configured zones in `dns_names_cf`:
                 - Calls the `call_cf` method to update DNS records for Cloudflare zones.
@@ -492,45 +1318,88 @@ class DDNSAgentv6(object):
                 - Calls the `call_do` method to update DNS records for DigitalOcean zones.
             - Otherwise, prints a message indicating the environment variable is missing
                 or there are no DigitalOcean zones configured.
+        6. Records the IPv6 address and the digest of the hosts in the `last_ip` cache file
+            if every configured host was updated.
 
         Args:
             self (DDNSAgentv6): An instance of the DDNSAgentv6 class.
+            force (bool): Push the address even if it matches the cached one.
         """
 
+        self._load_env()
+        force = force or os.getenv("DDNS_FORCE") == "1"
+
         self.ip_address = self.my_ipv6_address()
-        print("MY IP: %s" % (self.ip_address))
+        log.info("MY IP: %s", self.ip_address)
 
         self.parse_host_file()
+        hosts_digest = self.hosts_digest()
+
+        if not force and self.ip_unchanged(self.ip_address, hosts_digest):
+            log.info("NO CHANGE: %s", self.ip_address)
+            return
+
+        updated = True
 
-        cftoken = os.getenv("CLOUDFLARE_API_TOKEN")
+        cftoken = self._token("CLOUDFLARE_API_TOKEN")
         if cftoken is not None:
             if len(self.dns_names_cf.keys()) != 0:
                 try:
                     self.call_cf(cftoken)
                 except DDNSUpdateError as e:
-                    print("Error: %s" % (e))
+                    updated = False
+                    log.error("Error: %s", e)
         else:
-            print("CLOUDFLARE_API_TOKEN: type: %s" % (type(cftoken)))
+            updated = updated and len(self.dns_names_cf.keys()) == 0
+            log.warning("CLOUDFLARE_API_TOKEN: type: %s", type(cftoken))
 
-        dotoken = os.getenv("DIGITALOCEAN_TOKEN")
+        dotoken = self._token("DIGITALOCEAN_TOKEN")
         if dotoken is not None:
             if len(self.dns_names_do.keys()) != 0:
                 try:
                     self.call_do(dotoken)
                 except DDNSUpdateError as e:
-                    print("Error: %s" % (e))
+                    updated = False
+                    log.error("Error: %s", e)
         else:
-            print("DIGITALOCEAN_TOKEN: type: %s" % (type(dotoken)))
+            updated = updated and len(self.dns_names_do.keys()) == 0
+            log.warning("DIGITALOCEAN_TOKEN: type: %s", type(dotoken))
+
+        if updated:
+            _write_cache(IP_CACHE, "%s\n%s\n" % (self.ip_address, hosts_digest))
 
     def dns_update(
-        self, engine: CloudFlare.CloudFlare | Client, zone: str, dns_name: str, ip_address: str
+        self, engine: CFClient | Client, zone: str, dns_name: str, ip_address: str
     ) -> None:
-        if isinstance(engine, CloudFlare.CloudFlare):
+        from pydo import Client
+
+        if isinstance(engine, CFClient):
             self.cf_dns_update(engine, zone, dns_name, ip_address)
         elif isinstance(engine, Client):
             self.do_dns_update(engine, zone, dns_name, ip_address)
 
 
+def main() -> None:
+    """Run the DDNS update process, logging progress to the console."""
+    parser = argparse.ArgumentParser(
+        description="Update AAAA records with this host's IP"
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help='hosts file to read, "-" for stdin (default: $DDNS_CONFIG or ./ddns.hosts)',
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="update the records even if the address has not changed",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    agent = DDNSAgentv6(args.config)
+    agent(force=args.force)
+
+
 if __name__ == "__main__":
-    agent = DDNSAgentv6()
-    agent()
+    main()
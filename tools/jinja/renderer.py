@@ -23,8 +23,14 @@ Classes:
             render_template(template_path: str) -> str:
                 Renders a Jinja template file.
             
+            load_templates() -> list[tuple[Template, str]]:
+                Compiles the Jinja templates of the templates directory once.
+            
+            template_filenames() -> list[str]:
+                Lists the file names of the Jinja templates in the templates directory.
+            
             replace_env_variables(data: Union[str, dict, list]) -> Union[str, dict, list]:
-                Recursively replaces environment variables in data.
+                Replaces environment variables in data and its nested values.
             
             load_yaml_data(yaml_file: str) -> None:
                 Loads YAML data from a file.
@@ -33,16 +39,78 @@ Classes:
                 Renders templates with loaded YAML data and writes the output to files.
 """
 
+import multiprocessing
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Optional, Union
 
 import yaml
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
+
+try:
+    # the libyaml bindings parse several times faster than the pure Python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 load_dotenv()
 
+# matches ${NAME} references in string values of the YAML data
+_ENV_RE = re.compile(r"\$\{([^${}]*)\}")
+
+# below this many templates, starting worker processes costs more than it saves
+PARALLEL_MIN_TEMPLATES = 8
+
+# the environment of each templates directory used by a worker process
+_worker_envs: dict[str, Environment] = {}
+
+
+def _environment(templates_directory: str) -> Environment:
+    """
+    Creates the Jinja environment for a templates directory.
+
+    Templates are not expected to change while the environment is alive, so they are
+    compiled once and never checked for updates.
+
+    Args:
+        templates_directory (str): The directory containing the Jinja templates.
+
+    Returns:
+        Environment: The Jinja environment.
+    """
+    return Environment(
+        loader=FileSystemLoader(templates_directory),
+        auto_reload=False,
+        cache_size=400,
+    )
+
+
+def _render_one(
+    templates_directory: str,
+    yaml_data: Optional[Union[str, dict, list]],
+    filename: str,
+    output_directory: str,
+) -> None:
+    """
+    Renders a single template to the output directory inside a worker process.
+
+    Environments cannot be pickled, so each worker process creates its own.
+
+    Args:
+        templates_directory (str): The directory containing the Jinja templates.
+        yaml_data (Optional[Union[str, dict, list]]): The data to render the template with.
+        filename (str): The file name of the template.
+        output_directory (str): The directory where the rendered template will be saved.
+    """
+    env = _worker_envs.get(templates_directory)
+    if env is None:
+        env = _worker_envs[templates_directory] = _environment(templates_directory)
+    output_path = os.path.join(output_directory, filename.replace(".j2", ""))
+    env.get_template(filename).stream(yaml_data).dump(output_path, encoding="utf-8")
+
 
 class JinjaTemplateRenderer(object):
     """
@@ -53,13 +121,21 @@ class JinjaTemplateRenderer(object):
         output_directory (str): The directory where the rendered templates will be saved.
         env_vars (dict, optional): A dictionary containing environment variables.
             Keys are the lowercase names of the environment variables.
+        env (Environment, optional): A Jinja environment for the templates directory to
+            share with other renderers, so templates are only compiled once.
 
     Methods:
         render_template(template_path: str) -> str:
             Renders a Jinja template file.
 
+        load_templates() -> list[tuple[Template, str]]:
+            Compiles the Jinja templates of the templates directory once.
+
+        template_filenames() -> list[str]:
+            Lists the file names of the Jinja templates in the templates directory.
+
         replace_env_variables(data: Union[str, dict, list]) -> Union[str, dict, list]:
-            Recursively replaces environment variables in data.
+            Replaces environment variables in data and its nested values.
 
         load_yaml_data(yaml_file: str) -> None:
             Loads YAML data from a file.
@@ -73,14 +149,17 @@ class JinjaTemplateRenderer(object):
         templates_directory: str = "templates",
         output_directory: str = "output",
         env_vars: Optional[dict] = None,
+        env: Optional[Environment] = None,
     ) -> None:
         self.templates_directory: str = templates_directory
         self.output_directory: str = output_directory
-        self.env: Environment = Environment(
-            loader=FileSystemLoader(self.templates_directory)
-        )
+        self.env: Environment = env or _environment(self.templates_directory)
+        # worker processes build their own environment, which would bypass a shared one
+        self._parallel: bool = env is None
+        self._templates: Optional[list[tuple[Template, str]]] = None
         self.yaml_data: Optional[Union[str, dict, list]] = None
         self.env_vars: dict = env_vars or {}
+        self._env_cache: dict[str, str] = {}
 
     def render_template(self, template_path: str) -> str:
         """
@@ -95,11 +174,42 @@ class JinjaTemplateRenderer(object):
         template = self.env.get_template(os.path.basename(template_path))
         return template.render(self.yaml_data)
 
+    def load_templates(self) -> list[tuple[Template, str]]:
+        """
+        Compiles the Jinja templates of the templates directory once.
+
+        Returns:
+            list[tuple[Template, str]]: The compiled templates with their output file names.
+        """
+        if self._templates is None:
+            self._templates = [
+                (self.env.get_template(filename), filename.replace(".j2", ""))
+                for filename in self.template_filenames()
+            ]
+        return self._templates
+
+    def template_filenames(self) -> list[str]:
+        """
+        Lists the file names of the Jinja templates in the templates directory.
+
+        Returns:
+            list[str]: The sorted file names of the templates.
+        """
+        return sorted(
+            filename
+            for filename in os.listdir(self.templates_directory)
+            if filename.endswith(".j2")
+        )
+
     def replace_env_variables(
         self, data: Union[str, dict, list]
     ) -> Union[str, dict, list]:
         """
-        Recursively replaces environment variables in data.
+        Replaces environment variables in data and all of its nested values.
+
+        Nested dictionaries and lists are walked with an explicit stack and updated in place,
+        so deeply nested data cannot exceed the recursion limit. Each variable is looked up
+        once per call, however often it is referenced.
 
         Args:
             data (Union[str, dict, list]): The data to process.
@@ -107,30 +217,50 @@ class JinjaTemplateRenderer(object):
         Returns:
             Union[str, dict, list]: The processed data with environment variables replaced.
         """
+        self._env_cache.clear()
         if isinstance(data, str):
-            # Replace environment variables
-            env_var_pattern = r"\${([^\${}]*)}"
-            matches = re.findall(env_var_pattern, data)
-            for match in matches:
-                # Try to get the value from the provided dictionary first
-                env_variable = self.env_vars.get(match.lower())
-                if env_variable is None:
-                    # If not found, try to get it from the actual environment
-                    env_variable = os.getenv(match)
-                if env_variable:
-                    data = data.replace(f"${{{match}}}", env_variable)
-            return data
-        elif isinstance(data, dict):
-            # Recursively replace environment variables in nested dictionaries
-            for key, value in data.items():
-                data[key] = self.replace_env_variables(value)
-            return data
-        elif isinstance(data, list):
-            # Recursively replace environment variables in nested lists
-            return [self.replace_env_variables(item) for item in data]
-        else:
+            # Replace environment variables in a single pass over the string
+            return _ENV_RE.sub(self._env_value, data)
+        elif not isinstance(data, (dict, list)):
             return data
 
+        stack = [data]
+        # containers shared through YAML anchors are only processed once
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            items = node.items() if isinstance(node, dict) else enumerate(node)
+            for key, value in items:
+                if isinstance(value, str):
+                    node[key] = _ENV_RE.sub(self._env_value, value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        return data
+
+    def _env_value(self, match: re.Match) -> str:
+        """
+        Looks up the value of an environment variable reference.
+
+        Args:
+            match (re.Match): A match of `_ENV_RE`.
+
+        Returns:
+            str: The value of the variable, or the reference itself if it is unset or empty.
+        """
+        name = match.group(1)
+        value = self._env_cache.get(name)
+        if value is None:
+            # Try to get the value from the provided dictionary first
+            env_variable = self.env_vars.get(name.lower())
+            if env_variable is None:
+                # If not found, try to get it from the actual environment
+                env_variable = os.getenv(name)
+            value = self._env_cache[name] = env_variable or match.group(0)
+        return value
+
     def load_yaml_data(self, yaml_file: str) -> None:
         """
         Loads YAML data from a file.
@@ -139,11 +269,15 @@ class JinjaTemplateRenderer(object):
             yaml_file (str): The path to the YAML file.
         """
         with open(yaml_file, "r") as file:
-            self.yaml_data = yaml.safe_load(file)
+            self.yaml_data = yaml.load(file, Loader=SafeLoader)
 
     def __call__(self) -> None:
         """
         Renders templates with loaded YAML data and writes the output to files.
+
+        With at least `PARALLEL_MIN_TEMPLATES` templates, rendering is spread over a pool
+        of worker processes, unless the renderer was given a shared environment. Workers are
+        spawned rather than forked, as the renderer may run on one of several threads.
         """
         # Replace environment variables in YAML data
         if self.yaml_data is not None:
@@ -153,19 +287,30 @@ class JinjaTemplateRenderer(object):
         if not os.path.exists(self.output_directory):
             os.makedirs(self.output_directory)
 
+        # templates compiled in this process already are rendered here
+        if self._parallel and self._templates is None:
+            filenames = self.template_filenames()
+            if len(filenames) >= PARALLEL_MIN_TEMPLATES:
+                render = partial(
+                    _render_one,
+                    self.templates_directory,
+                    self.yaml_data,
+                    output_directory=self.output_directory,
+                )
+                # hand each worker one batch so the YAML data is pickled once per worker
+                chunksize = -(-len(filenames) // (os.cpu_count() or 1))
+                with ProcessPoolExecutor(
+                    mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    list(executor.map(render, filenames, chunksize=chunksize))
+                return
+
         # Render and write templates
-        for filename in os.listdir(self.templates_directory):
-            if filename.endswith(".j2"):
-                template_path = os.path.join(self.templates_directory, filename)
-                output_filename = filename.replace(".j2", "")
-                output_path = os.path.join(self.output_directory, output_filename)
-
-                # Render template with YAML data
-                rendered_template = self.render_template(template_path)
-
-                # Write rendered template to file
-                with open(output_path, "w") as output_file:
-                    output_file.write(rendered_template)
+        for template, output_filename in self.load_templates():
+            output_path = os.path.join(self.output_directory, output_filename)
+
+            # Stream the rendered template to file as it is generated
+            template.stream(self.yaml_data).dump(output_path, encoding="utf-8")
 
 
 # Example usage:
@@ -20,6 +20,9 @@ Classes:
             validate() -> bool:
                 Validates the generated DNS configurations.
 
+            prefetch_existing() -> None:
+                Loads the names of all AAAA records of the zone.
+
             unique() -> bool:
                 Checks if the generated DNS configurations are unique.
 
@@ -38,6 +41,15 @@ Classes:
             print_output(output_path: str) -> None:
                 Prints the generated machine ID and FQDN and creates a setup script.
 
+            setup() -> None:
+                Reads and validates the input and resolves the Cloudflare zone.
+
+            bind(cf: CFClient, zone_id: str, base_domain: str, prefix: str) -> None:
+                Uses an already resolved Cloudflare client and zone.
+
+            spawn() -> MachineIDGenerator:
+                Creates a generator sharing the client, zone and known records.
+
             __call__(output_path: str = "output") -> None:
                 Executes the machine ID generation process.
 
@@ -54,19 +66,52 @@ Example:
 """
 
 import os
+import re
 import secrets
-import shutil
-import string
+import threading
 
-import CloudFlare
-import validators
-from CloudFlare.exceptions import CloudFlareAPIError
 from dotenv import load_dotenv
 
-from tools.ddns.agent import DDNSAgentv6
+from tools.ddns.agent import (
+    CFAPIError,
+    CFClient,
+    DDNSAgentv6,
+    DDNSUpdateError,
+    is_fqdn,
+)
 
 load_dotenv()
 
+# DNS length limits of a single label and of a whole domain name
+MAX_LABEL_LENGTH = 63
+MAX_FQDN_LENGTH = 253
+# the longest network that still leaves room for a full length machine label
+MAX_NETWORK_LENGTH = MAX_FQDN_LENGTH - MAX_LABEL_LENGTH
+
+# a single DNS label of letters, digits and inner hyphens
+_LABEL_RE = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
+
+_ALPHABET = b"abcdefghijklmnopqrstuvwxyz"
+# random bytes from this value on are dropped so every letter stays equally likely
+_BYTE_LIMIT = 256 - 256 % len(_ALPHABET)
+
+
+def _quick_domain_ok(name: str) -> bool:
+    """
+    Cheap structural checks a domain name has to pass before the full pattern match.
+
+    Args:
+        name (str): The domain name to check.
+
+    Returns:
+        bool: False if `name` can not be a domain name, True if it needs the full check.
+    """
+    if not name or len(name) > MAX_FQDN_LENGTH:
+        return False
+    if name[0] == "." or name[-1] == "." or ".." in name or "." not in name:
+        return False
+    return True
+
 
 class MachineIDGenerator(object):
     """
@@ -89,14 +134,25 @@ class MachineIDGenerator(object):
         self.random_id_length = length
         self.machine_network = machine_network
         self.machine_prefix = machine_prefix
+        self._existing: set[str] | None = None
+        # guards _existing, which is shared with spawned generators
+        self._lock = threading.Lock()
 
     def random_id_generator(self) -> None:
         """
         Generates a random ID of the specified length.
+
+        Letters are drawn from one buffer of random bytes, which is refilled in the
+        unlikely case that too many bytes had to be dropped.
         """
-        self.random_id = "".join(
-            secrets.choice(string.ascii_lowercase) for _ in range(self.random_id_length)
-        )
+        random_id = bytearray()
+        while len(random_id) < self.random_id_length:
+            for byte in secrets.token_bytes(self.random_id_length * 2):
+                if byte < _BYTE_LIMIT:
+                    random_id.append(_ALPHABET[byte % len(_ALPHABET)])
+                    if len(random_id) == self.random_id_length:
+                        break
+        self.random_id = random_id.decode("ascii")
 
     def validate(self) -> bool:
         """
@@ -105,30 +161,38 @@ class MachineIDGenerator(object):
         Returns:
             bool: True if the configurations are valid, False otherwise.
         """
-        if not validators.domain(self.fqdn):
+        if not is_fqdn(self.fqdn):
             return False
         if not self.unique():
             return False
         return True
 
+    def prefetch_existing(self) -> None:
+        """
+        Loads the names of all AAAA records of the zone, so candidate IDs can be checked
+        for uniqueness without an API call each.
+        """
+        try:
+            dns_records = self.cf.list_aaaa(self.zone_id)
+        except CFAPIError as e:
+            exit(
+                "Error: /zones/dns_records %s - %d %s - api call failed"
+                % (self.base_domain, e, e)
+            )
+        self._existing = {dns_record["name"].lower() for dns_record in dns_records}
+
     def unique(self) -> bool:
         """
         Checks if the generated DNS configurations are unique.
 
+        The AAAA records of the zone are loaded on the first check and reused afterwards.
+
         Returns:
             bool: True if the configurations are unique, False otherwise.
         """
-        try:
-            params = {"name": self.fqdn, "match": "all", "type": "AAAA"}
-            dns_records = self.cf.zones.dns_records.get(self.zone_id, params=params)
-        except CloudFlareAPIError as e:
-            exit(
-                "Error: /zones/dns_records %s - %d %s - api call failed"
-                % (self.fqdn, e, e)
-            )
-        if len(dns_records) != 0:
-            return False
-        return True
+        if self._existing is None:
+            self.prefetch_existing()
+        return self.fqdn.lower() not in self._existing
 
     def validate_network(self) -> list[str]:
         """
@@ -140,13 +204,15 @@ class MachineIDGenerator(object):
         errors: list[str] = []
         if self.machine_network is None:
             return ['Error: "MACHINE_NETWORK" not set']
-        if not validators.domain(self.machine_network):
+        if not _quick_domain_ok(self.machine_network):
+            return ['Error: "MACHINE_NETWORK" not set to a proper FQDN']
+        if not is_fqdn(self.machine_network):
             errors.append('Error: "MACHINE_NETWORK" not set to a proper FQDN')
-        if len(self.machine_network) > 253 - 63:
+        if len(self.machine_network) > MAX_NETWORK_LENGTH:
             errors.append('Error: "MACHINE_NETWORK" length is too long')
             errors.append(
                 'Hint: For proper functioning cap "MACHINE_NETWORK" length to '
-                + str(253 - 63)
+                + str(MAX_NETWORK_LENGTH)
             )
         return errors
 
@@ -154,27 +220,21 @@ class MachineIDGenerator(object):
         """
         Validates the MACHINE_PREFIX environment variable.
 
+        Also records the length of the generated labels as `label_length`.
+
         Returns:
             List[str]: A list of error messages, if any.
         """
         errors: list[str] = []
         if self.machine_prefix is None:
             return ['Error: "MACHINE_PREFIX" not set']
-        label_length = len(self.machine_prefix) + 1 + self.random_id_length
-        if (
-            not validators.hostname(
-                self.machine_prefix,
-                skip_ipv6_addr=True,
-                skip_ipv4_addr=True,
-                may_have_port=False,
-                rfc_2782=True,
-            )
-            or self.machine_prefix.find(".") != -1
-        ):
+        # + 1 for one "-" char
+        self.label_length = len(self.machine_prefix) + 1 + self.random_id_length
+        if _LABEL_RE.match(self.machine_prefix) is None:
             errors.append(
                 'Error: "MACHINE_PREFIX" not set to a proper "hostname" component'
             )
-        if label_length > 63:
+        if self.label_length > MAX_LABEL_LENGTH:
             errors.append(
                 'Error: generated "label" length will exceed the limit please reduce\n\t'
                 + '"MACHINE_PREFIX" to match the length requirements of a DNS label'
@@ -182,7 +242,7 @@ class MachineIDGenerator(object):
             errors.append(
                 "Hint: DNS Label length is capped at 63 characters.\n\t"
                 + '"MACHINE_PREFIX" is capped at '
-                + str(63 - self.random_id_length + 1)
+                + str(MAX_LABEL_LENGTH - 1 - self.random_id_length)
                 + " characters"
             )
         return errors
@@ -204,16 +264,10 @@ class MachineIDGenerator(object):
             self.prefix = self.machine_prefix
             errors.extend(self.validate_prefix())
 
-        if (
-            self.machine_network is not None
-            and self.machine_prefix is not None
-            and self.machine_network != ""
-            and self.machine_prefix != ""
-        ):
-            label_length = (
-                len(self.machine_prefix) + 1 + self.random_id_length
-            )  # + 1 for one "-" char
-            if label_length + len(self.machine_network) > 253:
+        # both are validated at this point, so label_length is known
+        if self.machine_network and self.machine_prefix:
+            # + 1 for the "." between label and network
+            if self.label_length + 1 + len(self.machine_network) > MAX_FQDN_LENGTH:
                 errors.append(
                     'Error: generated "hostname" length will exceed the limit please reduce either '
                     + 'or both of\n\t"MACHINE_PREFIX" or "MACHINE_NETWORK" to match the length'
@@ -238,37 +292,42 @@ class MachineIDGenerator(object):
         """
         Prints the generated machine ID and FQDN and creates a setup script.
 
+        Other files already in the output path, such as rendered templates, are kept.
+
         Args:
             output_path (str): The output path for the setup script.
         """
-        print("GENERATED Machine ID: " + self.host_label)
-        print("GENERATED FQDN: " + self.fqdn)
+        # printed at once, so output of generators on other threads is not mixed in
         print(
+            "GENERATED Machine ID: {}\n"
+            "GENERATED FQDN: {}\n"
             "Please add the following to your terminal profile file of the host machine:"
-        )
-        print()
-        print(
-            "\texport DDNS_HOST={}\n\texport MACHINE_ID={}".format(
-                self.fqdn, self.host_label
+            "\n\n\texport DDNS_HOST={}\n\texport MACHINE_ID={}".format(
+                self.host_label, self.fqdn, self.fqdn, self.host_label
             )
         )
-        if os.path.isdir(output_path):
-            shutil.rmtree(output_path)
-        os.makedirs(output_path, 777)
-        with open(os.path.join(output_path, "setup.sh"), "w") as script:
-            commands: list[str] = []
-            commands.append("#!/bin/bash\n\n")
-            commands.append("export MACHINE_NET={}\n".format(self.base_domain))
-            commands.append("export MACHINE_ID={}\n".format(self.host_label))
-            commands.append("export DDNS_HOST={}\n".format(self.fqdn))
-            script.writelines(commands)
+        os.makedirs(output_path, 0o755, exist_ok=True)
+        script = (
+            "#!/bin/bash\n\n"
+            "export MACHINE_NET={}\n"
+            "export MACHINE_ID={}\n"
+            "export DDNS_HOST={}\n".format(self.base_domain, self.host_label, self.fqdn)
+        )
+        fd = os.open(
+            os.path.join(output_path, "setup.sh"),
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            0o755,
+        )
+        try:
+            os.write(fd, script.encode())
+        finally:
+            os.close(fd)
 
-    def __call__(self, output_path: str = "output") -> None:
+    def setup(self) -> None:
         """
-        Executes the machine ID generation process.
+        Reads and validates the input, creates the Cloudflare client and resolves the zone.
 
-        Args:
-            output_path (str, optional): The output path for the setup script. Defaults to "output".
+        Generating several machine IDs only needs this once, see `generate`.
         """
         if self.machine_network is None:
             self.machine_network = os.getenv("MACHINE_NETWORK")
@@ -276,34 +335,72 @@ class MachineIDGenerator(object):
             self.machine_prefix = os.getenv("MACHINE_PREFIX")
         self.validate_input()
 
-        zone_name = ".".join(self.base_domain.split(".")[-2:])
-        self.cf = CloudFlare.CloudFlare()
+        cftoken = os.getenv("CLOUDFLARE_API_TOKEN")
+        if cftoken is None or cftoken == "":
+            exit('Error: "CLOUDFLARE_API_TOKEN" not set')
+
+        self.cf = CFClient(cftoken)
+        zone_id = os.getenv("CF_ZONE_ID")
+        if zone_id:
+            # trusted as given, a wrong ID fails the first record listing
+            self.zone_id: str = zone_id
+            return
+
         try:
-            zone_id = os.getenv("CF_ZONE_ID")
-            if zone_id is None or zone_id == "":
-                del zone_id
-                params = {"name": zone_name}
-                zones = self.cf.zones.get(params=params)
-            else:
-                self.zone_id = zone_id
-                params = {"id": self.zone_id}
-                zones = self.cf.zones.get(params=params)
-        except CloudFlareAPIError as e:
-            exit("Error: /zones %d %s - api call failed" % (e, e))
-        except Exception as e:
-            exit("Error: /zones.get - %s - api call failed" % (e))
-
-        if isinstance(zones, list):
-            if len(zones) == 0:
-                exit("Error: /zones.get - %s - zone not found" % (zone_name))
-            elif len(zones) != 1:
-                exit(
-                    "Error: /zones.get - %s - api call returned %d items"
-                    % (zone_name, len(zones))
-                )
-            else:
-                self.zone_id: str = zones[0]["id"]
+            zone = DDNSAgentv6.find_zone(self.cf, self.base_domain)
+        except DDNSUpdateError as e:
+            exit(str(e))
+        if zone is None:
+            exit("Error: /zones.get - %s - zone not found" % (self.base_domain))
+        self.zone_id = zone[1]
+
+    def bind(self, cf: CFClient, zone_id: str, base_domain: str, prefix: str) -> None:
+        """
+        Uses an already resolved Cloudflare client and zone instead of running `setup`.
+
+        The values are taken as they are, they are expected to come from a generator
+        that has run `setup`.
 
+        Args:
+            cf (CFClient): The Cloudflare client.
+            zone_id (str): The ID of the Cloudflare zone of `base_domain`.
+            base_domain (str): The validated machine network.
+            prefix (str): The validated machine prefix.
+        """
+        self.cf = cf
+        self.zone_id = zone_id
+        self.base_domain = base_domain
+        self.prefix = prefix
+
+    def spawn(self) -> "MachineIDGenerator":
+        """
+        Creates a generator that shares the Cloudflare client, the zone and the known records.
+
+        Generators spawned from the same set up generator can run `generate` on separate
+        threads without handing out the same machine ID twice.
+
+        Returns:
+            MachineIDGenerator: The new generator.
+        """
+        with self._lock:
+            if self._existing is None:
+                self.prefetch_existing()
+        midgen = MachineIDGenerator(
+            self.random_id_length, self.machine_network, self.machine_prefix
+        )
+        midgen.bind(self.cf, self.zone_id, self.base_domain, self.prefix)
+        midgen._existing = self._existing
+        midgen._lock = self._lock
+        return midgen
+
+    def __call__(self, output_path: str = "output") -> None:
+        """
+        Executes the machine ID generation process.
+
+        Args:
+            output_path (str, optional): The output path for the setup script. Defaults to "output".
+        """
+        self.setup()
         self.print_config()
         self.generate()
         self.print_output(output_path)
@@ -316,12 +413,15 @@ class MachineIDGenerator(object):
             self.random_id_generator()
             self.host_label = self.prefix + "-" + self.random_id
             self.fqdn = ".".join([self.host_label, self.base_domain])
-            if self.validate():
-                ddns = DDNSAgentv6()
-                ddns.do_dns_update(self.cf, self.zone_id, self.fqdn, "::1")
-                self.machine_id = self.host_label
-                self.ddns_host = self.fqdn
-                break
+            with self._lock:
+                if not self.validate():
+                    continue
+                # reserve the name, so no other generator picks it meanwhile
+                self._existing.add(self.fqdn.lower())
+            DDNSAgentv6.cf_dns_update(self.cf, self.zone_id, self.fqdn, "::1")
+            self.machine_id = self.host_label
+            self.ddns_host = self.fqdn
+            break
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
+import copy
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
 
@@ -7,10 +9,14 @@ from tools.manage.machineidgenerator import MachineIDGenerator
 
 load_dotenv()
 
+TEMPLATES_DIRECTORY = "./tools/rpi/templates/"
+
 
 class ConfigGenerator(object):
     """Config Generator"""
 
+    max_workers: int = 8
+
     def __init__(
         self,
         random_length: int,
@@ -24,21 +30,47 @@ class ConfigGenerator(object):
     def __call__(
         self, number_of_devices: int, input_file: str, output_path: str = "output"
     ) -> None:
-        for i in range(1, number_of_devices + 1):
-            output_dir = os.path.join(
-                output_path, f"device-{i:0{len(str(number_of_devices)) + 1}d}"
-            )
-            midgen = MachineIDGenerator(
-                self.random_length, self.machine_network, self.machine_prefix
-            )
-            midgen(output_dir)
-            values = {"machine_id": midgen.machine_id, "ddns_host": midgen.ddns_host}
-            jinjarender = JinjaTemplateRenderer(
-                "./tools/rpi/templates/", output_dir, values
-            )
-            jinjarender.load_yaml_data(input_file)
-            jinjarender()
-        pass
+        # one generator for all devices, so the input is validated, the zone resolved
+        # and the zone's records fetched only once
+        midgen = MachineIDGenerator(
+            self.random_length, self.machine_network, self.machine_prefix
+        )
+        midgen.setup()
+        midgen.print_config()
+        # the templates are compiled and the input file is parsed once for all devices
+        renderer = JinjaTemplateRenderer(TEMPLATES_DIRECTORY, output_path)
+        renderer.load_templates()
+        renderer.load_yaml_data(input_file)
+        # devices only wait on the Cloudflare API, so they are generated concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = []
+            for i in range(1, number_of_devices + 1):
+                output_dir = os.path.join(
+                    output_path, f"device-{i:0{len(str(number_of_devices)) + 1}d}"
+                )
+                futures.append(
+                    executor.submit(
+                        self._one_device, midgen.spawn(), renderer, output_dir
+                    )
+                )
+            for future in futures:
+                future.result()
+
+    def _one_device(
+        self,
+        midgen: MachineIDGenerator,
+        renderer: JinjaTemplateRenderer,
+        output_dir: str,
+    ) -> None:
+        midgen.generate()
+        midgen.print_output(output_dir)
+        values = {"machine_id": midgen.machine_id, "ddns_host": midgen.ddns_host}
+        jinjarender = JinjaTemplateRenderer(
+            TEMPLATES_DIRECTORY, output_dir, values, renderer.env
+        )
+        # the environment variables are replaced in place, so each device needs a copy
+        jinjarender.yaml_data = copy.deepcopy(renderer.yaml_data)
+        jinjarender()
 
 
 if __name__ == "__main__":